@@ -7,6 +7,11 @@ from flask_cors import CORS
 
 from services import portfolio
 from services import monte_carlo
+from services import portfolio_session
+from services import stress
+from services import hedging
+from services import coalescing
+from services import tail_risk
 # ----------------------------
 # Environment loading (simple .env parser)
 # ----------------------------
@@ -66,6 +71,13 @@ DEFAULT_PRICE = get_env_float("DEFAULT_CURRENT_PRICE", 100.0)
 DEFAULT_MC_SIMS = get_env_int("DEFAULT_MC_SIMULATIONS", 10000)
 DEFAULT_MC_HORIZON = get_env_float("DEFAULT_MC_HORIZON_YEARS", 0.5)
 DEFAULT_MC_STEPS = get_env_int("DEFAULT_MC_STEPS", 252)
+SESSION_MAX_COUNT = get_env_int("SESSION_MAX_COUNT", 256)
+SESSION_IDLE_TTL_SECONDS = get_env_float("SESSION_IDLE_TTL_SECONDS", 1800.0)
+SESSION_MAX_LEGS = get_env_int("SESSION_MAX_LEGS", 5000)
+MC_MAX_BOOTSTRAP = get_env_int("MC_MAX_BOOTSTRAP", tail_risk.MAX_BOOTSTRAP)
+LSM_MAX_LEGS = get_env_int("LSM_MAX_LEGS", portfolio.LSM_MAX_LEGS)
+COALESCE_ENABLED = get_env_bool("COALESCE_ENABLED", True)
+COALESCE_MAX_WAIT_SECONDS = get_env_float("COALESCE_MAX_WAIT_SECONDS", 30.0)
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -194,12 +206,25 @@ def analyze_portfolio():
         if "volatility" not in pos or pos["volatility"] is None:
             pos["volatility"] = default_vol
 
-    result = portfolio.compute_portfolio(portfolio_positions, S, r)
+    try:
+        result = portfolio.compute_portfolio(
+            portfolio_positions,
+            S,
+            r,
+            american_method=data.get("american_method", "lattice"),
+            lsm_max_legs=LSM_MAX_LEGS
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
     return jsonify(result)
 
 # ----------------------------
 # Portfolio Monte Carlo simulation endpoint
 # ----------------------------
+# Identical concurrent simulations share one computation
+SIMULATION_FLIGHTS = coalescing.SingleFlight(max_wait=COALESCE_MAX_WAIT_SECONDS)
+
+
 @app.route("/portfolio/simulate", methods=["POST"])
 def simulate_portfolio_route():
     data = request.get_json()
@@ -211,7 +236,13 @@ def simulate_portfolio_route():
     r = data.get("risk_free_rate", DEFAULT_RISK_FREE)
     T = data.get("horizon", DEFAULT_MC_HORIZON)  # years
     n_simulations = data.get("n_simulations", DEFAULT_MC_SIMS)
+    var_levels = data.get("var_levels", [0.05, 0.01])
+    n_bootstrap = data.get("n_bootstrap", 0)
     ticker = data.get("ticker", "").upper()
+    try:
+        n_bootstrap = tail_risk.validate_bootstrap(n_bootstrap, MC_MAX_BOOTSTRAP)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
     # Get volatility from dataset
     sigma = DEFAULT_VOL
@@ -223,21 +254,267 @@ def simulate_portfolio_route():
         if "volatility" not in pos or pos["volatility"] is None:
             pos["volatility"] = sigma
 
-    simulation = monte_carlo.simulate_portfolio(
-        portfolio_positions,
-        S,
-        T,
-        r,
-        sigma,
-        steps=DEFAULT_MC_STEPS,
-        n_simulations=n_simulations
-    )
+    def run_simulation():
+        simulation = monte_carlo.simulate_portfolio(
+            portfolio_positions,
+            S,
+            T,
+            r,
+            sigma,
+            steps=DEFAULT_MC_STEPS,
+            n_simulations=n_simulations,
+            var_levels=var_levels,
+            n_bootstrap=n_bootstrap,
+            max_bootstrap=MC_MAX_BOOTSTRAP
+        )
+
+        # Convert numpy arrays to lists for JSON serialization
+        if "portfolio_values" in simulation:
+            simulation["portfolio_values"] = simulation["portfolio_values"].tolist()
+
+        # Serialize once so coalesced requests share the same body
+        return app.json.dumps(simulation)
+
+    try:
+        if COALESCE_ENABLED:
+            key = coalescing.canonical_key(
+                "simulate", portfolio_positions, S, r, T, sigma,
+                DEFAULT_MC_STEPS, n_simulations, var_levels, n_bootstrap
+            )
+            body = SIMULATION_FLIGHTS.do(key, run_simulation)
+        else:
+            body = run_simulation()
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return app.response_class(body, mimetype="application/json")
+
+
+@app.route("/metrics/coalescing", methods=["GET"])
+def coalescing_metrics():
+    """Counters for /portfolio/simulate request coalescing."""
+    stats = SIMULATION_FLIGHTS.stats()
+    stats["enabled"] = COALESCE_ENABLED
+    stats["max_wait_seconds"] = COALESCE_MAX_WAIT_SECONDS
+    return jsonify(stats)
+
+# ----------------------------
+# Delta-hedging backtest endpoint
+# ----------------------------
+@app.route("/portfolio/hedge", methods=["POST"])
+def hedge_portfolio_route():
+    data = request.get_json()
+    if not data or "portfolio" not in data:
+        return jsonify({"error": "Portfolio data required"}), 400
+
+    S = data.get("current_price", DEFAULT_PRICE)
+    r = data.get("risk_free_rate", DEFAULT_RISK_FREE)
+    T = data.get("horizon", DEFAULT_MC_HORIZON)  # years
+    n_simulations = data.get("n_simulations", DEFAULT_MC_SIMS)
+    ticker = data.get("ticker", "").upper()
+
+    # Paths evolve at the ticker's historical volatility
+    sigma = DEFAULT_VOL
+    if ticker and ticker in VOL_DATA.get("tickers", {}):
+        sigma = VOL_DATA["tickers"][ticker]["volatility"]
+
+    try:
+        result = hedging.simulate_delta_hedge(
+            data["portfolio"],
+            S,
+            T,
+            r,
+            sigma,
+            steps=data.get("steps", DEFAULT_MC_STEPS),
+            n_simulations=n_simulations,
+            rebalance_every=data.get("rebalance_every", 1),
+            transaction_cost=data.get("transaction_cost", 0.0),
+            var_levels=data.get("var_levels", [0.05, 0.01]),
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
 
     # Convert numpy arrays to lists for JSON serialization
-    if "portfolio_values" in simulation:
-        simulation["portfolio_values"] = simulation["portfolio_values"].tolist()
+    for key in ("hedged_pnl", "unhedged_pnl", "hedging_error", "transaction_costs"):
+        result[key] = result[key].tolist()
+
+    return jsonify(result)
+
+# ----------------------------
+# Portfolio stress-testing endpoints
+# ----------------------------
+@app.route("/portfolio/stress/scenarios", methods=["GET"])
+def list_stress_scenarios():
+    """List the scenario library, including replays for ?ticker= if known."""
+    ticker = request.args.get("ticker", "").upper()
+    ticker_data = VOL_DATA.get("tickers", {}).get(ticker) if ticker else None
+    return jsonify(stress.scenario_library(ticker_data))
+
+
+@app.route("/portfolio/stress", methods=["POST"])
+def stress_portfolio():
+    data = request.get_json()
+    if not data or "portfolio" not in data:
+        return jsonify({"error": "Portfolio data required"}), 400
+
+    S = data.get("current_price", DEFAULT_PRICE)
+    r = data.get("risk_free_rate", DEFAULT_RISK_FREE)
+    ticker = data.get("ticker", "").upper()
+
+    default_vol = DEFAULT_VOL
+    ticker_data = None
+    if ticker and ticker in VOL_DATA.get("tickers", {}):
+        ticker_data = VOL_DATA["tickers"][ticker]
+        default_vol = ticker_data["volatility"]
+
+    try:
+        result = stress.run_stress(
+            data["portfolio"],
+            S,
+            r,
+            default_vol,
+            scenarios=data.get("scenarios"),
+            ticker_data=ticker_data,
+        )
+    except (TypeError, ValueError) as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(result)
+
+# ----------------------------
+# Stateful portfolio sessions
+# ----------------------------
+SESSIONS = portfolio_session.SessionStore(
+    max_sessions=SESSION_MAX_COUNT,
+    idle_ttl=SESSION_IDLE_TTL_SECONDS,
+    max_legs=SESSION_MAX_LEGS,
+)
+
+
+def _session_or_404(session_id):
+    try:
+        return SESSIONS.get(session_id), None
+    except KeyError as exc:
+        return None, (jsonify({"error": str(exc.args[0])}), 404)
+
+
+@app.route("/portfolio/session", methods=["POST"])
+def create_session():
+    """Create a session from an initial portfolio and return its full analysis."""
+    data = request.get_json() or {}
+    S = data.get("current_price", DEFAULT_PRICE)
+    r = data.get("risk_free_rate", DEFAULT_RISK_FREE)
+    ticker = data.get("ticker", "").upper()
+
+    default_vol = DEFAULT_VOL
+    if ticker and ticker in VOL_DATA.get("tickers", {}):
+        default_vol = VOL_DATA["tickers"][ticker]["volatility"]
+
+    positions = data.get("portfolio", [])
+    if not isinstance(positions, list):
+        return jsonify({"error": "portfolio must be a list"}), 400
+
+    try:
+        session = SESSIONS.create(S, r, default_vol, positions)
+        with session.lock:
+            result = session.snapshot()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(result), 201
+
+
+@app.route("/portfolio/session/<session_id>", methods=["GET"])
+def get_session(session_id):
+    session, error = _session_or_404(session_id)
+    if error:
+        return error
+    with session.lock:
+        return jsonify(session.snapshot())
+
+
+@app.route("/portfolio/session/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    try:
+        SESSIONS.delete(session_id)
+    except KeyError as exc:
+        return jsonify({"error": str(exc.args[0])}), 404
+    return jsonify({"status": "deleted"})
+
+
+@app.route("/portfolio/session/<session_id>/legs", methods=["POST"])
+def add_session_legs(session_id):
+    """Add legs; only the new legs are priced."""
+    session, error = _session_or_404(session_id)
+    if error:
+        return error
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "request body must be an object"}), 400
+    legs = data.get("legs")
+    if not isinstance(legs, list):
+        return jsonify({"error": "legs list required"}), 400
+
+    with session.lock:
+        try:
+            added = session.add_legs(legs)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        result = session.snapshot(include_positions=False)
+    result["positions"] = added
+    return jsonify(result)
+
+
+@app.route("/portfolio/session/<session_id>/legs/<leg_id>", methods=["PATCH"])
+def modify_session_leg(session_id, leg_id):
+    """Modify one leg; only that leg is repriced."""
+    session, error = _session_or_404(session_id)
+    if error:
+        return error
+    changes = request.get_json() or {}
+    if not isinstance(changes, dict):
+        return jsonify({"error": "leg changes must be an object"}), 400
+
+    with session.lock:
+        try:
+            updated = session.modify_leg(leg_id, changes)
+        except KeyError as exc:
+            return jsonify({"error": str(exc.args[0])}), 404
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        result = session.snapshot(include_positions=False)
+    result["positions"] = [updated]
+    return jsonify(result)
+
 
-    return jsonify(simulation)
+@app.route("/portfolio/session/<session_id>/legs/<leg_id>", methods=["DELETE"])
+def remove_session_leg(session_id, leg_id):
+    session, error = _session_or_404(session_id)
+    if error:
+        return error
+
+    with session.lock:
+        try:
+            session.remove_leg(leg_id)
+        except KeyError as exc:
+            return jsonify({"error": str(exc.args[0])}), 404
+        return jsonify(session.snapshot(include_positions=False))
+
+
+@app.route("/portfolio/session/<session_id>/market", methods=["POST"])
+def update_session_market(session_id):
+    """Change spot and/or rate; the whole book is revalued in one vectorized pass."""
+    session, error = _session_or_404(session_id)
+    if error:
+        return error
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "request body must be an object"}), 400
+
+    with session.lock:
+        try:
+            session.set_market(data.get("current_price"), data.get("risk_free_rate"))
+        except (TypeError, ValueError) as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify(session.snapshot(include_positions=bool(data.get("include_positions", False))))
 
 # ----------------------------
 # Run Flask server
@@ -1,9 +1,73 @@
 """Black-Scholes option pricing and Greeks utilities."""
 
+import math
 from typing import Dict
 
 import numpy as np
-from scipy.stats import norm
+
+_INV_SQRT_2PI = 0.3989422804014327
+_INV_SQRT_2 = 0.7071067811865476
+
+# Hart (1968) double-precision rational approximation coefficients for the
+# standard normal tail, as popularised by West (2005). Accurate to ~1e-14 and
+# keeps scipy out of the server import graph.
+_HART_P = (
+    0.0352624965998911,
+    0.700383064443688,
+    6.37396220353165,
+    33.912866078383,
+    112.079291497871,
+    221.213596169931,
+    220.206867912376,
+)
+_HART_Q = (
+    0.0883883476483184,
+    1.75566716318264,
+    16.064177579207,
+    86.7807322029461,
+    296.564248779674,
+    637.333633378831,
+    793.826512519948,
+    440.413735825752,
+)
+
+
+def _norm_pdf(x):
+    """Standard normal density; works on scalars and arrays."""
+    if np.ndim(x) == 0:
+        x = float(x)
+        return _INV_SQRT_2PI * math.exp(-0.5 * x * x)
+    x = np.asarray(x, dtype=float)
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _norm_cdf(x):
+    """Standard normal CDF using pure NumPy; works on scalars and arrays."""
+    if np.ndim(x) == 0:
+        # Scalar legs: math.erfc is exact and avoids array overhead
+        return 0.5 * math.erfc(-float(x) * _INV_SQRT_2)
+    x = np.asarray(x, dtype=float)
+    ax = np.abs(x)
+    expo = np.exp(-0.5 * ax * ax)
+
+    # Central region: ratio of polynomials (Horner form)
+    num = np.full_like(ax, _HART_P[0])
+    for c in _HART_P[1:]:
+        num = num * ax + c
+    den = np.full_like(ax, _HART_Q[0])
+    for c in _HART_Q[1:]:
+        den = den * ax + c
+    central = expo * num / den
+
+    # Far tail: continued fraction
+    frac = ax + 0.65
+    for k in (4.0, 3.0, 2.0, 1.0):
+        frac = ax + k / frac
+    tail = expo / frac * _INV_SQRT_2PI
+
+    lower = np.where(ax < 7.07106781186547, central, tail)
+    lower = np.where(ax > 37.0, 0.0, lower)
+    return np.where(x > 0, 1.0 - lower, lower)
 
 
 def _validate_inputs(spot: float, strike: float, rate: float, vol: float, maturity: float):
@@ -48,9 +112,9 @@ def black_scholes_price(
 
     d1, d2 = _d1_d2(spot, strike, rate, vol, maturity)
     if option_type == "call":
-        price = spot * norm.cdf(d1) - strike * np.exp(-rate * maturity) * norm.cdf(d2)
+        price = spot * _norm_cdf(d1) - strike * np.exp(-rate * maturity) * _norm_cdf(d2)
     else:
-        price = strike * np.exp(-rate * maturity) * norm.cdf(-d2) - spot * norm.cdf(-d1)
+        price = strike * np.exp(-rate * maturity) * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
     return float(price)
 
 
@@ -75,22 +139,22 @@ def black_scholes_greeks(
         raise ValueError("option_type must be 'call' or 'put'.")
 
     d1, d2 = _d1_d2(spot, strike, rate, vol, maturity)
-    pdf_d1 = norm.pdf(d1)
+    pdf_d1 = _norm_pdf(d1)
 
     if option_type == "call":
-        delta = norm.cdf(d1)
+        delta = _norm_cdf(d1)
         theta = (
             - (spot * pdf_d1 * vol) / (2 * np.sqrt(maturity))
-            - rate * strike * np.exp(-rate * maturity) * norm.cdf(d2)
+            - rate * strike * np.exp(-rate * maturity) * _norm_cdf(d2)
         )
-        rho = strike * maturity * np.exp(-rate * maturity) * norm.cdf(d2)
+        rho = strike * maturity * np.exp(-rate * maturity) * _norm_cdf(d2)
     else:
-        delta = norm.cdf(d1) - 1
+        delta = _norm_cdf(d1) - 1
         theta = (
             - (spot * pdf_d1 * vol) / (2 * np.sqrt(maturity))
-            + rate * strike * np.exp(-rate * maturity) * norm.cdf(-d2)
+            + rate * strike * np.exp(-rate * maturity) * _norm_cdf(-d2)
         )
-        rho = -strike * maturity * np.exp(-rate * maturity) * norm.cdf(-d2)
+        rho = -strike * maturity * np.exp(-rate * maturity) * _norm_cdf(-d2)
 
     gamma = pdf_d1 / (spot * vol * np.sqrt(maturity))
     vega = spot * pdf_d1 * np.sqrt(maturity)
@@ -102,3 +166,87 @@ def black_scholes_greeks(
         "theta": float(theta),
         "rho": float(rho),
     }
+
+
+def black_scholes_price_arrays(spot, strike, rate, vol, maturity, is_call) -> np.ndarray:
+    """
+    Vectorized Black-Scholes price only, over broadcastable arrays.
+
+    Cheaper than black_scholes_arrays when Greeks are not needed (e.g. a
+    scenarios x legs revaluation grid). Inputs are not validated.
+    """
+    d1, d2 = _d1_d2(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(rate, dtype=float),
+        np.asarray(vol, dtype=float),
+        np.asarray(maturity, dtype=float),
+    )
+    sign = np.where(np.asarray(is_call, dtype=bool), 1.0, -1.0)
+    disc_k = strike * np.exp(-np.asarray(rate, dtype=float) * maturity)
+    return sign * (spot * _norm_cdf(sign * d1) - disc_k * _norm_cdf(sign * d2))
+
+
+def black_scholes_delta_arrays(spot, strike, rate, vol, maturity, is_call) -> np.ndarray:
+    """Vectorized Black-Scholes delta only, over broadcastable arrays. Inputs are not validated."""
+    d1, _ = _d1_d2(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(rate, dtype=float),
+        np.asarray(vol, dtype=float),
+        np.asarray(maturity, dtype=float),
+    )
+    sign = np.where(np.asarray(is_call, dtype=bool), 1.0, -1.0)
+    return sign * _norm_cdf(sign * d1)
+
+
+def black_scholes_arrays(spot, strike, rate, vol, maturity, is_call) -> Dict[str, np.ndarray]:
+    """
+    Vectorized Black-Scholes price and Greeks over broadcastable arrays.
+
+    Inputs are not validated here; callers are expected to have checked
+    positivity up front (e.g. when a leg enters a portfolio session).
+
+    Args:
+        spot, strike, rate, vol, maturity: Scalars or arrays that broadcast together.
+        is_call: Boolean array (True for calls, False for puts).
+
+    Returns:
+        Dict of arrays with keys: price, delta, gamma, vega, theta, rho.
+        Units match black_scholes_price / black_scholes_greeks.
+    """
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    vol = np.asarray(vol, dtype=float)
+    maturity = np.asarray(maturity, dtype=float)
+    is_call = np.asarray(is_call, dtype=bool)
+
+    sqrt_t = np.sqrt(maturity)
+    vol_sqrt_t = vol * sqrt_t
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol**2) * maturity) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+
+    # Signed arguments fold call/put into a single evaluation: put terms
+    # use N(-d), so flip the sign of d1/d2 for puts.
+    sign = np.where(is_call, 1.0, -1.0)
+    nd1 = _norm_cdf(sign * d1)
+    nd2 = _norm_cdf(sign * d2)
+    pdf_d1 = _norm_pdf(d1)
+    disc_k = strike * np.exp(-rate * maturity)
+
+    price = sign * (spot * nd1 - disc_k * nd2)
+    delta = sign * nd1
+    theta = -(spot * pdf_d1 * vol) / (2 * sqrt_t) - sign * rate * disc_k * nd2
+    rho = sign * maturity * disc_k * nd2
+    gamma = pdf_d1 / (spot * vol_sqrt_t)
+    vega = spot * pdf_d1 * sqrt_t
+
+    return {
+        "price": price,
+        "delta": delta,
+        "gamma": gamma,
+        "vega": vega,
+        "theta": theta,
+        "rho": rho,
+    }
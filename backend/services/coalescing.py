@@ -0,0 +1,100 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers that ask for the same canonical key share one in-flight
+computation: the first caller (leader) runs it, later callers (followers)
+wait for its result. Nothing is cached once the computation finishes.
+"""
+
+import hashlib
+import json
+import threading
+
+
+def canonical_key(*parts):
+    """Stable hash of JSON-serializable request parameters (dict key order ignored)."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Share one computation among concurrent callers with the same key.
+
+    Parameters:
+    max_wait : float : seconds a follower waits for the leader before giving
+                       up and computing on its own (None waits indefinitely)
+    """
+
+    def __init__(self, max_wait=30.0):
+        self.max_wait = max_wait
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "wait_timeouts": 0,
+            "errors": 0,
+        }
+
+    def do(self, key, fn):
+        """
+        Run fn() once per key among concurrent callers and return its result.
+
+        Followers receive the leader's return value (treat it as read-only)
+        or re-raise the leader's exception.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats["leaders"] += 1
+            else:
+                flight.followers += 1
+
+        if leader:
+            try:
+                flight.result = fn()
+            except Exception as exc:
+                flight.error = exc
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            return flight.result
+
+        if not flight.done.wait(self.max_wait):
+            with self._lock:
+                # No longer waiting on this flight: stop counting it in "waiting"
+                flight.followers -= 1
+                self._stats["wait_timeouts"] += 1
+            return fn()
+
+        with self._lock:
+            self._stats["coalesced"] += 1
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self):
+        """Counters plus the number of computations currently in flight."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+            stats["waiting"] = sum(f.followers for f in self._flights.values())
+        return stats
@@ -5,8 +5,12 @@ This module simulates stock price paths using Geometric Brownian Motion (GBM)
 and computes portfolio outcomes under these simulated paths.
 """
 
+import math
+
 import numpy as np
+from models import american
 from models import black_scholes  # import your pricing functions
+from services import tail_risk
 
 
 def simulate_stock_price(S0, T, r, sigma, steps=252, n_simulations=10000, seed=None):
@@ -42,7 +46,58 @@ def simulate_stock_price(S0, T, r, sigma, steps=252, n_simulations=10000, seed=N
     return S
 
 
-def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simulations=10000):
+def iter_stock_price_steps(S0, T, r, sigma, steps=252, n_simulations=10000, seed=None):
+    """
+    Stream GBM prices one time step at a time.
+
+    Same dynamics as simulate_stock_price, but only the current (n_simulations,)
+    slice is held in memory, so callers can walk long horizons with many paths.
+
+    Yields:
+    (int, float, np.ndarray) : (step index 1..steps, time in years, prices at that step)
+    """
+    # Local generator: never touches NumPy's process-wide RNG, which other
+    # request threads may be using
+    rng = np.random.default_rng(seed)
+
+    dt = T / steps
+    drift = (r - 0.5 * sigma**2) * dt
+    diffusion = sigma * np.sqrt(dt)
+    S = np.full(n_simulations, float(S0))
+    for t in range(1, steps + 1):
+        S = S * np.exp(drift + diffusion * rng.standard_normal(n_simulations))
+        yield t, t * dt, S
+
+
+def price_american_lsm(S0, strike, maturity, vol, is_call, r, steps=50, n_simulations=10000, seed=None):
+    """
+    Price American options with Longstaff-Schwartz on GBM paths.
+
+    One (n_simulations x steps) block of standard normals is drawn and
+    shared by every leg (common random numbers); each leg rescales it to
+    its own volatility and exercise grid inside longstaff_schwartz_arrays,
+    so the cost does not grow with the number of distinct volatilities.
+
+    Parameters:
+    S0 : float : current stock price
+    strike, maturity, vol : array-like : per-leg strike, expiry (years), volatility
+    is_call : array-like of bool : True for calls
+    r : float : risk-free rate
+    steps : int : exercise dates per leg, evenly spaced up to its own expiry
+    n_simulations : int : number of simulation paths
+    seed : int : random seed for reproducibility
+
+    Returns:
+    (np.ndarray, np.ndarray) : per-leg prices and Monte Carlo standard errors
+    """
+    rng = np.random.default_rng(seed)
+    normals = rng.standard_normal((n_simulations, steps))
+    return american.longstaff_schwartz_arrays(S0, strike, r, vol, maturity, is_call, normals)
+
+
+def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simulations=10000,
+                       var_levels=tail_risk.DEFAULT_LEVELS, n_bootstrap=0,
+                       max_bootstrap=tail_risk.MAX_BOOTSTRAP):
     """
     Simulate portfolio outcomes at horizon T.
     
@@ -63,6 +118,10 @@ def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simula
     sigma : float : volatility
     steps : int : number of time steps
     n_simulations : int : number of simulation paths
+    var_levels : iterable of float : tail levels for VaR/ES (must include 0.05 and 0.01
+                 for the VaR_5/VaR_1/ES_5/ES_1 fields)
+    n_bootstrap : int : bootstrap replicates for VaR/ES confidence intervals (0 = off)
+    max_bootstrap : int : largest accepted n_bootstrap (ValueError above it)
     
     Returns:
     dict : {
@@ -70,9 +129,21 @@ def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simula
         "mean": float,
         "std": float,
         "VaR_5": float,       # 5th percentile
-        "VaR_1": float        # 1st percentile
+        "VaR_1": float,       # 1st percentile
+        "ES_5": float,        # mean of worst 5%
+        "ES_1": float,        # mean of worst 1%
+        "tail": list of {"level", "VaR", "ES"[, "VaR_ci", "ES_ci"]}
     }
     """
+    # Reject bad inputs before paying for the simulation
+    S0 = float(S0)
+    r = float(r)
+    if not (math.isfinite(S0) and math.isfinite(r)):
+        raise ValueError("Spot and rate must be finite numbers.")
+    if S0 <= 0:
+        raise ValueError("Spot must be positive.")
+    n_bootstrap = tail_risk.validate_bootstrap(n_bootstrap, max_bootstrap)
+
     # Simulate stock paths
     S_paths = simulate_stock_price(S0, T, r, sigma, steps, n_simulations)
     
@@ -96,7 +167,10 @@ def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simula
             payoff = np.maximum(K - final_prices, 0)
         
         # Calculate initial premium (t=0 option price)
-        premium = black_scholes.black_scholes_price(S0, K, r, vol, time_to_expiry, option_type)
+        if str(pos.get("exercise") or "european").lower() == "american":
+            premium = float(american.american_price_arrays(S0, K, r, vol, time_to_expiry, option_type == "call"))
+        else:
+            premium = black_scholes.black_scholes_price(S0, K, r, vol, time_to_expiry, option_type)
         
         # Net P&L = (Expiration Payoff - Initial Premium) * Quantity * Side
         if side == "short":
@@ -113,15 +187,23 @@ def simulate_portfolio(portfolio_positions, S0, T, r, sigma, steps=252, n_simula
     # Compute basic risk statistics
     mean = np.mean(portfolio_values)
     std = np.std(portfolio_values)
-    VaR_5 = np.percentile(portfolio_values, 5)
-    VaR_1 = np.percentile(portfolio_values, 1)
+
+    # All VaR/ES levels from a single partition pass
+    levels = tuple(sorted(set(var_levels) | {0.05, 0.01}, reverse=True))
+    tail = tail_risk.tail_metrics(
+        portfolio_values, levels, n_bootstrap=n_bootstrap, max_bootstrap=max_bootstrap
+    )["tail"]
+    by_level = {entry["level"]: entry for entry in tail}
 
     return {
         "portfolio_values": portfolio_values,
         "mean": mean,
         "std": std,
-        "VaR_5": VaR_5,
-        "VaR_1": VaR_1
+        "VaR_5": by_level[0.05]["VaR"],
+        "VaR_1": by_level[0.01]["VaR"],
+        "ES_5": by_level[0.05]["ES"],
+        "ES_1": by_level[0.01]["ES"],
+        "tail": tail
     }
 
 
@@ -136,3 +218,4 @@ if __name__ == "__main__":
     print(f"Mean portfolio value: {results['mean']:.2f}")
     print(f"Std portfolio value: {results['std']:.2f}")
     print(f"5% VaR: {results['VaR_5']:.2f}")
+    print(f"5% ES: {results['ES_5']:.2f}")
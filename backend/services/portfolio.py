@@ -4,11 +4,133 @@ Portfolio service module.
 Functions:
 - Compute portfolio value using Black-Scholes
 - Aggregate Greeks for all positions
+- Normalize positions into columnar arrays for vectorized engines
+- Dispatch on a position's "exercise" field (European Black-Scholes or
+  American lattice / Longstaff-Schwartz)
 """
 
+import math
+
+import numpy as np
+
+from models import american
 from models import black_scholes
+from services import monte_carlo
+
+EXERCISE_STYLES = {"european", "american"}
+AMERICAN_METHODS = {"lattice", "lsm"}
+# Longstaff-Schwartz cost grows with paths x legs x exercise dates, so the
+# number of American legs it will price per request is capped.
+LSM_MAX_LEGS = 100
+
+
+def validate_market(S, r):
+    """
+    Convert spot and rate to floats, rejecting missing or non-finite values.
+
+    Returns:
+    tuple : (S, r) as floats
+
+    Raises:
+    ValueError : if either value is not a finite number or spot is not positive
+    """
+    try:
+        S = float(S)
+        r = float(r)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid market data: {exc}") from exc
+    if not (math.isfinite(S) and math.isfinite(r)):
+        raise ValueError("Spot and rate must be finite numbers.")
+    if S <= 0:
+        raise ValueError("Spot must be positive.")
+    return S, r
+
+
+def normalize_leg(pos, default_vol):
+    """
+    Validate a position dict and fill in defaults.
 
-def compute_position_value(pos, S, r):
+    Parameters:
+    pos : dict : position in the same shape accepted by /portfolio/analyze
+    default_vol : float or None : volatility used when the leg does not carry one
+
+    Returns:
+    dict : cleaned position with lower-cased type/side and float fields
+
+    Raises:
+    ValueError : if a field is missing or out of range
+    """
+    try:
+        option_type = str(pos["type"]).lower()
+        side = str(pos.get("side", "long")).lower()
+        exercise = str(pos.get("exercise") or "european").lower()
+        quantity = float(pos["quantity"])
+        strike = float(pos["strike"])
+        maturity = float(pos["time_to_expiry"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid position: {exc}") from exc
+
+    vol = pos.get("volatility")
+    if vol is None:
+        vol = default_vol
+    if vol is None:
+        raise ValueError("Volatility is required.")
+    try:
+        vol = float(vol)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid position: {exc}") from exc
+
+    if option_type not in {"call", "put"}:
+        raise ValueError("type must be 'call' or 'put'.")
+    if side not in {"long", "short"}:
+        raise ValueError("side must be 'long' or 'short'.")
+    if exercise not in EXERCISE_STYLES:
+        raise ValueError("exercise must be 'european' or 'american'.")
+    if strike <= 0:
+        raise ValueError("Strike must be positive.")
+    if vol <= 0:
+        raise ValueError("Volatility must be positive.")
+    if maturity <= 0:
+        raise ValueError("Maturity must be positive (in years).")
+
+    return {
+        "type": option_type,
+        "side": side,
+        "quantity": quantity,
+        "strike": strike,
+        "time_to_expiry": maturity,
+        "volatility": vol,
+        "exercise": exercise,
+    }
+
+
+def positions_to_columns(portfolio_positions, default_vol):
+    """
+    Normalize positions and pack them into NumPy columns.
+
+    Returns:
+    dict : {
+        "strike", "time_to_expiry", "volatility", "signed_quantity": float arrays,
+        "is_call", "is_american": bool arrays,
+        "legs": list of normalized position dicts
+    }
+    """
+    legs = [normalize_leg(pos, default_vol) for pos in portfolio_positions]
+    return {
+        "strike": np.array([leg["strike"] for leg in legs], dtype=float),
+        "time_to_expiry": np.array([leg["time_to_expiry"] for leg in legs], dtype=float),
+        "volatility": np.array([leg["volatility"] for leg in legs], dtype=float),
+        "is_call": np.array([leg["type"] == "call" for leg in legs], dtype=bool),
+        "is_american": np.array([leg["exercise"] == "american" for leg in legs], dtype=bool),
+        "signed_quantity": np.array(
+            [-leg["quantity"] if leg["side"] == "short" else leg["quantity"] for leg in legs],
+            dtype=float,
+        ),
+        "legs": legs,
+    }
+
+
+def compute_position_value(pos, S, r, model_result=None):
     """
     Compute value and Greeks of a single option position.
 
@@ -19,10 +141,13 @@ def compute_position_value(pos, S, r):
         "quantity": int,
         "strike": float,
         "time_to_expiry": float,
-        "volatility": float
+        "volatility": float,
+        "exercise": "european" (default) or "american"
     }
     S : float : current stock price
     r : float : risk-free rate
+    model_result : dict : optional precomputed per-unit price and Greeks
+                   (used by compute_portfolio to batch American legs)
 
     Returns:
     dict : {
@@ -40,12 +165,22 @@ def compute_position_value(pos, S, r):
     K = pos["strike"]
     T = pos["time_to_expiry"]
     sigma = pos["volatility"]
+    exercise = str(pos.get("exercise") or "european").lower()
 
-    # Calculate Black-Scholes price using the correct function
-    value = black_scholes.black_scholes_price(S, K, r, sigma, T, option_type)
+    if model_result is not None:
+        value = model_result["price"]
+        greeks = model_result
+    elif exercise == "american":
+        # Binomial lattice price and Greeks
+        lattice = american.american_greeks_arrays(S, K, r, sigma, T, option_type.lower() == "call")
+        greeks = {k: float(v) for k, v in lattice.items()}
+        value = greeks["price"]
+    else:
+        # Calculate Black-Scholes price using the correct function
+        value = black_scholes.black_scholes_price(S, K, r, sigma, T, option_type)
 
-    # Calculate Greeks using the correct function
-    greeks = black_scholes.black_scholes_greeks(S, K, r, sigma, T, option_type)
+        # Calculate Greeks using the correct function
+        greeks = black_scholes.black_scholes_greeks(S, K, r, sigma, T, option_type)
 
     # Apply quantity multiplier
     value *= qty
@@ -64,7 +199,7 @@ def compute_position_value(pos, S, r):
         vega *= -1
         rho *= -1
 
-    return {
+    result = {
         "value": value,
         "delta": delta,
         "gamma": gamma,
@@ -72,9 +207,55 @@ def compute_position_value(pos, S, r):
         "vega": vega,
         "rho": rho
     }
+    if model_result is not None and "value_stderr" in model_result:
+        result["value_stderr"] = model_result["value_stderr"] * abs(qty)
+    return result
 
 
-def compute_portfolio(portfolio_positions, S, r):
+def _american_model_results(legs, S, r, american_method, lsm_max_legs=LSM_MAX_LEGS):
+    """
+    Price every American leg in one vectorized lattice call.
+
+    With american_method="lsm" the values come from Longstaff-Schwartz
+    instead (Greeks stay on the lattice) and carry a Monte Carlo standard error;
+    more than lsm_max_legs American legs is rejected with ValueError.
+
+    Parameters:
+    legs : list of dict : positions already passed through normalize_leg
+
+    Returns:
+    dict : leg index -> per-unit {"price", greeks...[, "value_stderr"]}
+    """
+    if american_method not in AMERICAN_METHODS:
+        raise ValueError("american_method must be 'lattice' or 'lsm'.")
+    indices = [i for i, leg in enumerate(legs) if leg["exercise"] == "american"]
+    if not indices:
+        return {}
+    if american_method == "lsm" and len(indices) > lsm_max_legs:
+        raise ValueError(
+            f"american_method 'lsm' supports at most {lsm_max_legs} American legs; "
+            "use 'lattice' for larger books."
+        )
+
+    american_legs = [legs[i] for i in indices]
+    K = np.array([leg["strike"] for leg in american_legs], dtype=float)
+    T = np.array([leg["time_to_expiry"] for leg in american_legs], dtype=float)
+    vol = np.array([leg["volatility"] for leg in american_legs], dtype=float)
+    is_call = np.array([leg["type"] == "call" for leg in american_legs], dtype=bool)
+
+    lattice = american.american_greeks_arrays(S, K, r, vol, T, is_call)
+    if american_method == "lsm":
+        prices, stderr = monte_carlo.price_american_lsm(S, K, T, vol, is_call, r)
+        lattice["price"] = prices
+        lattice["value_stderr"] = stderr
+
+    return {
+        i: {k: float(v[n]) for k, v in lattice.items()}
+        for n, i in enumerate(indices)
+    }
+
+
+def compute_portfolio(portfolio_positions, S, r, american_method="lattice", lsm_max_legs=LSM_MAX_LEGS):
     """
     Compute total portfolio value and aggregate Greeks.
 
@@ -82,6 +263,9 @@ def compute_portfolio(portfolio_positions, S, r):
     portfolio_positions : list of dicts (each is a position)
     S : float : current stock price
     r : float : risk-free rate
+    american_method : str : "lattice" (default) or "lsm" for legs with
+                      exercise="american"
+    lsm_max_legs : int : maximum American legs priced with "lsm"
 
     Returns:
     dict : {
@@ -103,8 +287,13 @@ def compute_portfolio(portfolio_positions, S, r):
 
     positions_results = []
 
-    for pos in portfolio_positions:
-        result = compute_position_value(pos, S, r)
+    # Validate market data and every leg once, then dispatch from the normalized legs
+    S, r = validate_market(S, r)
+    legs = [normalize_leg(pos, None) for pos in portfolio_positions]
+    american_results = _american_model_results(legs, S, r, american_method, lsm_max_legs)
+
+    for i, leg in enumerate(legs):
+        result = compute_position_value(leg, S, r, american_results.get(i))
         positions_results.append(result)
 
         total_value += result["value"]
@@ -0,0 +1,305 @@
+"""
+Portfolio session service module.
+
+Keeps a portfolio on the server in columnar form so interactive edits only
+reprice the legs they touch.
+
+Functions / classes:
+- PortfolioSession: columnar legs plus running aggregated Greeks
+- SessionStore: bounded, idle-evicting registry of sessions
+"""
+
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from models import american
+from models import black_scholes
+from services import portfolio
+
+# Order of the per-leg result columns (matches compute_portfolio keys)
+RESULT_FIELDS = ("value", "delta", "gamma", "theta", "vega", "rho")
+_KERNEL_FIELDS = ("price", "delta", "gamma", "theta", "vega", "rho")
+
+
+class PortfolioSession:
+    """
+    Server-side portfolio with columnar legs and running totals.
+
+    Legs live in preallocated NumPy columns (swap-remove on delete), and each
+    leg's signed contribution is cached so add/modify/remove adjust the totals
+    by the delta of the touched rows only. A market change reprices every leg
+    in a single vectorized call and re-anchors the totals.
+    """
+
+    def __init__(self, session_id, S, r, default_vol, max_legs, capacity=16):
+        self.session_id = session_id
+        self.spot, self.rate = portfolio.validate_market(S, r)
+        try:
+            self.default_vol = float(default_vol)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid market data: {exc}") from exc
+        if not math.isfinite(self.default_vol) or self.default_vol <= 0:
+            raise ValueError("Volatility must be a positive finite number.")
+        self.max_legs = max_legs
+        self.last_access = time.monotonic()
+        self.lock = threading.Lock()
+
+        self._n = 0
+        self._next_id = 1
+        self._slot_of = {}  # leg id -> row index
+        self._legs = []  # normalized position dicts, row-aligned
+        self._allocate(capacity)
+        self._totals = np.zeros(len(RESULT_FIELDS))
+
+    # ----------------------------
+    # Storage helpers
+    # ----------------------------
+    def _allocate(self, capacity):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._strike = np.ones(capacity)
+        self._maturity = np.ones(capacity)
+        self._vol = np.ones(capacity)
+        self._is_call = np.zeros(capacity, dtype=bool)
+        self._is_american = np.zeros(capacity, dtype=bool)
+        self._signed_qty = np.zeros(capacity)
+        self._results = np.zeros((capacity, len(RESULT_FIELDS)))
+
+    def _grow(self, needed):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        old = (self._ids, self._strike, self._maturity, self._vol,
+               self._is_call, self._is_american, self._signed_qty, self._results)
+        self._allocate(new_capacity)
+        n = self._n
+        for dst, src in zip(
+            (self._ids, self._strike, self._maturity, self._vol,
+             self._is_call, self._is_american, self._signed_qty, self._results),
+            old,
+        ):
+            dst[:n] = src[:n]
+
+    def _write_row(self, slot, leg_id, leg):
+        self._ids[slot] = leg_id
+        self._strike[slot] = leg["strike"]
+        self._maturity[slot] = leg["time_to_expiry"]
+        self._vol[slot] = leg["volatility"]
+        self._is_call[slot] = leg["type"] == "call"
+        self._is_american[slot] = leg["exercise"] == "american"
+        sign = -1.0 if leg["side"] == "short" else 1.0
+        self._signed_qty[slot] = sign * leg["quantity"]
+
+    def _price_rows(self, rows):
+        """Reprice the given rows (slice or index array) and return their contributions."""
+        greeks = black_scholes.black_scholes_arrays(
+            self.spot,
+            self._strike[rows],
+            self.rate,
+            self._vol[rows],
+            self._maturity[rows],
+            self._is_call[rows],
+        )
+        stacked = np.column_stack([greeks[k] for k in _KERNEL_FIELDS])
+
+        # American legs are repriced on the lattice
+        is_american = self._is_american[rows]
+        if is_american.any():
+            lattice = american.american_greeks_arrays(
+                self.spot,
+                self._strike[rows][is_american],
+                self.rate,
+                self._vol[rows][is_american],
+                self._maturity[rows][is_american],
+                self._is_call[rows][is_american],
+            )
+            stacked[is_american] = np.column_stack([lattice[k] for k in _KERNEL_FIELDS])
+
+        return stacked * self._signed_qty[rows, None]
+
+    def _slot(self, leg_id):
+        try:
+            return self._slot_of[int(leg_id)]
+        except (KeyError, TypeError, ValueError):
+            raise KeyError(f"Leg {leg_id} not found") from None
+
+    def _row_result(self, slot):
+        result = {"id": int(self._ids[slot])}
+        result.update(
+            {k: float(v) for k, v in zip(RESULT_FIELDS, self._results[slot])}
+        )
+        return result
+
+    # ----------------------------
+    # Public operations
+    # ----------------------------
+    def add_legs(self, positions):
+        """
+        Add legs and price only those legs.
+
+        Returns:
+        list of dict : per-leg results (with assigned ids) for the new legs
+        """
+        legs = [portfolio.normalize_leg(pos, self.default_vol) for pos in positions]
+        if not legs:
+            return []
+        if self._n + len(legs) > self.max_legs:
+            raise ValueError(f"Session leg limit ({self.max_legs}) exceeded.")
+
+        start = self._n
+        self._grow(start + len(legs))
+        for offset, leg in enumerate(legs):
+            slot = start + offset
+            leg_id = self._next_id
+            self._next_id += 1
+            self._write_row(slot, leg_id, leg)
+            self._slot_of[leg_id] = slot
+            self._legs.append(leg)
+        self._n = start + len(legs)
+
+        rows = slice(start, self._n)
+        contrib = self._price_rows(rows)
+        self._results[rows] = contrib
+        self._totals += contrib.sum(axis=0)
+        return [self._row_result(slot) for slot in range(start, self._n)]
+
+    def modify_leg(self, leg_id, changes):
+        """Apply field changes to one leg and reprice it."""
+        slot = self._slot(leg_id)
+        merged = dict(self._legs[slot])
+        merged.update(changes)
+        leg = portfolio.normalize_leg(merged, self.default_vol)
+
+        self._write_row(slot, int(self._ids[slot]), leg)
+        self._legs[slot] = leg
+        contrib = self._price_rows(np.array([slot]))[0]
+        self._totals += contrib - self._results[slot]
+        self._results[slot] = contrib
+        return self._row_result(slot)
+
+    def remove_leg(self, leg_id):
+        """Remove one leg, subtracting its cached contribution from the totals."""
+        slot = self._slot(leg_id)
+        self._totals -= self._results[slot]
+
+        last = self._n - 1
+        if slot != last:
+            # Swap-remove: move the last row into the freed slot
+            for column in (self._ids, self._strike, self._maturity, self._vol,
+                           self._is_call, self._is_american, self._signed_qty,
+                           self._results):
+                column[slot] = column[last]
+            self._legs[slot] = self._legs[last]
+            self._slot_of[int(self._ids[slot])] = slot
+        self._legs.pop()
+        del self._slot_of[int(leg_id)]
+        self._n = last
+
+        if self._n == 0:
+            self._totals[:] = 0.0
+
+    def set_market(self, S=None, r=None):
+        """Update spot and/or rate and revalue the whole book in one vectorized call."""
+        # Validate both before touching the session, so a bad value changes nothing
+        self.spot, self.rate = portfolio.validate_market(
+            self.spot if S is None else S,
+            self.rate if r is None else r,
+        )
+
+        rows = slice(0, self._n)
+        if self._n:
+            self._results[rows] = self._price_rows(rows)
+        # Full re-sum also clears any floating-point drift from incremental updates
+        self._totals = self._results[rows].sum(axis=0)
+
+    def totals(self):
+        """Return the running aggregated totals in compute_portfolio's shape."""
+        return {
+            f"total_{k}": float(v) for k, v in zip(RESULT_FIELDS, self._totals)
+        }
+
+    def snapshot(self, include_positions=True):
+        """Return totals, market state and (optionally) every leg's result."""
+        result = {
+            "session_id": self.session_id,
+            "current_price": self.spot,
+            "risk_free_rate": self.rate,
+            "n_legs": self._n,
+        }
+        result.update(self.totals())
+        if include_positions:
+            positions = []
+            for slot in range(self._n):
+                row = self._row_result(slot)
+                row["position"] = dict(self._legs[slot])
+                positions.append(row)
+            result["positions"] = positions
+        return result
+
+
+class SessionStore:
+    """
+    Thread-safe registry of portfolio sessions.
+
+    Memory is bounded by max_sessions (least recently used sessions are
+    evicted first) and by max_legs per session. Sessions idle for longer
+    than idle_ttl seconds are dropped lazily on every store access.
+    """
+
+    def __init__(self, max_sessions=256, idle_ttl=1800.0, max_legs=5000):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_legs = max_legs
+        self._sessions = OrderedDict()  # ordered by last access
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+
+    def create(self, S, r, default_vol, positions=()):
+        """
+        Build a session with its initial legs and register it.
+
+        The session is only stored once market data and every leg have
+        validated, so a rejected request never occupies a slot.
+        """
+        session = PortfolioSession(uuid.uuid4().hex, S, r, default_vol, self.max_legs)
+        session.add_legs(positions)
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+            session.last_access = now
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        """Return a live session and mark it as recently used; KeyError if missing."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Session {session_id} not found")
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise KeyError(f"Session {session_id} not found")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
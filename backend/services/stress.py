@@ -0,0 +1,219 @@
+"""
+Stress-testing service module.
+
+Functions:
+- Named scenario library (standard shocks + ticker-scaled historical replays)
+- Revalue a portfolio under every scenario in one broadcast (scenarios x legs)
+  Black-Scholes call (lattice for American legs), with per-leg P&L attribution
+"""
+
+import numpy as np
+
+from models import american
+from models import black_scholes
+from services import portfolio
+
+# Standard regulatory-style shocks.
+#   spot_shift : relative move in the underlying (-0.20 = -20%)
+#   vol_mult   : multiplier applied to each leg's volatility
+#   rate_shift : absolute change in the risk-free rate (0.01 = +100bp)
+STANDARD_SCENARIOS = {
+    "spot_down_20": {"spot_shift": -0.20, "vol_mult": 1.0, "rate_shift": 0.0},
+    "spot_down_10": {"spot_shift": -0.10, "vol_mult": 1.0, "rate_shift": 0.0},
+    "spot_up_10": {"spot_shift": 0.10, "vol_mult": 1.0, "rate_shift": 0.0},
+    "vol_up_50pct": {"spot_shift": 0.0, "vol_mult": 1.5, "rate_shift": 0.0},
+    "vol_down_25pct": {"spot_shift": 0.0, "vol_mult": 0.75, "rate_shift": 0.0},
+    "rate_up_100bp": {"spot_shift": 0.0, "vol_mult": 1.0, "rate_shift": 0.01},
+    "rate_down_100bp": {"spot_shift": 0.0, "vol_mult": 1.0, "rate_shift": -0.01},
+    "spot_down_20_vol_up_50pct": {"spot_shift": -0.20, "vol_mult": 1.5, "rate_shift": 0.0},
+}
+
+# Approximate broad-market (S&P 500) peak-to-trough episodes. Each replay is
+# scaled to the ticker by its volatility relative to MARKET_VOL and floored
+# at the ticker's own worst observed range (min_price / max_price - 1).
+HISTORICAL_EPISODES = {
+    "replay_1987": {"index_move": -0.205, "vol_mult": 3.0, "rate_shift": -0.005},
+    "replay_2008": {"index_move": -0.45, "vol_mult": 2.5, "rate_shift": -0.02},
+    "replay_2020": {"index_move": -0.34, "vol_mult": 2.5, "rate_shift": -0.015},
+}
+MARKET_VOL = 0.16
+_BETA_BOUNDS = (0.5, 2.0)
+_MIN_VOL = 1e-4
+
+
+def historical_scenarios(ticker_data):
+    """
+    Build ticker-specific replay scenarios from a VOL_DATA ticker entry.
+
+    Parameters:
+    ticker_data : dict : one entry of VOL_DATA["tickers"] (needs volatility,
+                         latest_price, min_price, max_price)
+
+    Returns:
+    dict : scenario name -> scenario dict (same keys as STANDARD_SCENARIOS)
+    """
+    vol = float(ticker_data["volatility"])
+    latest = float(ticker_data["latest_price"])
+    low = float(ticker_data["min_price"])
+    high = float(ticker_data["max_price"])
+
+    beta = float(np.clip(vol / MARKET_VOL, *_BETA_BOUNDS))
+    worst_range_move = low / high - 1.0
+
+    scenarios = {}
+    for name, episode in HISTORICAL_EPISODES.items():
+        scenarios[name] = {
+            "spot_shift": max(episode["index_move"] * beta, worst_range_move),
+            "vol_mult": episode["vol_mult"],
+            "rate_shift": episode["rate_shift"],
+        }
+    # Revisit the extremes of the ticker's own history
+    scenarios["historical_low"] = {"spot_shift": low / latest - 1.0, "vol_mult": 1.0, "rate_shift": 0.0}
+    scenarios["historical_high"] = {"spot_shift": high / latest - 1.0, "vol_mult": 1.0, "rate_shift": 0.0}
+    return scenarios
+
+
+def scenario_library(ticker_data=None):
+    """Return every named scenario available for a ticker (standard + replays)."""
+    library = dict(STANDARD_SCENARIOS)
+    if ticker_data:
+        library.update(historical_scenarios(ticker_data))
+    return library
+
+
+def resolve_scenarios(requested, library):
+    """
+    Turn a request's scenario list into (names, spot_shift, vol_mult, rate_shift) arrays.
+
+    Each item is either a library name or a custom dict with an optional
+    "name" and any of spot_shift / vol_mult / rate_shift. None selects the
+    whole library.
+
+    Raises:
+    ValueError : for a non-list request, unknown names or invalid shocks
+    """
+    if requested is None:
+        requested = list(library)
+    elif not isinstance(requested, list):
+        raise ValueError("scenarios must be a list of names or objects.")
+
+    names, spot_shift, vol_mult, rate_shift = [], [], [], []
+    for i, item in enumerate(requested):
+        if isinstance(item, str):
+            if item not in library:
+                raise ValueError(f"Unknown scenario '{item}'.")
+            name, scenario = item, library[item]
+        elif isinstance(item, dict):
+            name, scenario = item.get("name", f"custom_{i}"), item
+        else:
+            raise ValueError("Scenarios must be names or objects.")
+
+        try:
+            s = float(scenario.get("spot_shift", 0.0))
+            v = float(scenario.get("vol_mult", 1.0))
+            r = float(scenario.get("rate_shift", 0.0))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid scenario '{name}': {exc}") from exc
+        if s <= -1.0:
+            raise ValueError(f"Scenario '{name}': spot_shift must be greater than -1.")
+        if v <= 0:
+            raise ValueError(f"Scenario '{name}': vol_mult must be positive.")
+
+        names.append(name)
+        spot_shift.append(s)
+        vol_mult.append(v)
+        rate_shift.append(r)
+
+    return names, np.array(spot_shift), np.array(vol_mult), np.array(rate_shift)
+
+
+def run_stress(portfolio_positions, S, r, default_vol, scenarios=None, ticker_data=None):
+    """
+    Revalue a portfolio under a set of scenarios in one broadcast call.
+
+    Parameters:
+    portfolio_positions : list of dict : positions as for compute_portfolio
+    S : float : current stock price
+    r : float : risk-free rate
+    default_vol : float : volatility for legs that do not carry one
+    scenarios : list or None : library names and/or custom scenario dicts
+    ticker_data : dict or None : VOL_DATA ticker entry for historical replays
+
+    Returns:
+    dict : {
+        "base_value": float,
+        "scenarios": list of {
+            "name", "spot", "vol_mult", "rate",
+            "value": float, "pnl": float,
+            "leg_pnl": list of float (one per position, input order)
+        },
+        "worst_scenario": str or None
+    }
+    """
+    S = float(S)
+    r = float(r)
+    if S <= 0:
+        raise ValueError("Spot must be positive.")
+
+    cols = portfolio.positions_to_columns(portfolio_positions, default_vol)
+    library = scenario_library(ticker_data)
+    names, spot_shift, vol_mult, rate_shift = resolve_scenarios(scenarios, library)
+
+    K = cols["strike"]
+    T = cols["time_to_expiry"]
+    qty = cols["signed_quantity"]
+
+    base_leg = qty * black_scholes.black_scholes_price_arrays(
+        S, K, r, cols["volatility"], T, cols["is_call"]
+    )
+
+    # (scenarios x 1) against (legs,) -> (scenarios x legs)
+    spots = S * (1.0 + spot_shift)
+    rates = r + rate_shift
+    vols = np.maximum(cols["volatility"][None, :] * vol_mult[:, None], _MIN_VOL)
+    shocked_leg = qty * black_scholes.black_scholes_price_arrays(
+        spots[:, None], K, rates[:, None], vols, T, cols["is_call"]
+    )
+
+    # American legs: same grid, priced on the lattice (vectorized over scenarios x legs)
+    am = cols["is_american"]
+    if am.any():
+        base_leg[am] = qty[am] * american.american_price_arrays(
+            S, K[am], r, cols["volatility"][am], T[am], cols["is_call"][am]
+        )
+        shocked_leg[:, am] = qty[am] * american.american_price_arrays(
+            spots[:, None], K[am], rates[:, None], vols[:, am], T[am], cols["is_call"][am]
+        )
+
+    leg_pnl = shocked_leg - base_leg
+    values = shocked_leg.sum(axis=1)
+    pnl = leg_pnl.sum(axis=1)
+
+    results = []
+    for i, name in enumerate(names):
+        results.append({
+            "name": name,
+            "spot": float(spots[i]),
+            "vol_mult": float(vol_mult[i]),
+            "rate": float(rates[i]),
+            "value": float(values[i]),
+            "pnl": float(pnl[i]),
+            "leg_pnl": leg_pnl[i].tolist(),
+        })
+
+    return {
+        "base_value": float(base_leg.sum()),
+        "scenarios": results,
+        "worst_scenario": names[int(np.argmin(pnl))] if names else None,
+    }
+
+
+if __name__ == "__main__":
+    # Quick test
+    test_portfolio = [
+        {"type": "call", "side": "long", "quantity": 2, "strike": 105, "time_to_expiry": 0.5, "volatility": 0.25},
+        {"type": "put", "side": "short", "quantity": 1, "strike": 95, "time_to_expiry": 0.25, "volatility": 0.3}
+    ]
+    result = run_stress(test_portfolio, 100, 0.03, 0.25)
+    for scenario in result["scenarios"]:
+        print(f"{scenario['name']:>28}: P&L {scenario['pnl']:+.2f}")
@@ -0,0 +1,207 @@
+"""
+Tail-risk metrics for simulated P&L samples.
+
+Computes VaR at any number of levels plus Expected Shortfall (CVaR) from a
+single O(n) partition instead of full sorts, with optional vectorized
+bootstrap confidence intervals. Works on an in-memory sample or on chunks
+fed from a streaming simulation via TailAccumulator.
+
+VaR follows np.percentile's default (linear interpolation) on the P&L
+sample, so it is a (usually negative) P&L value. ES at level a is the mean
+of the worst ceil(a * n) outcomes.
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_LEVELS = (0.05, 0.01)
+# Upper bound on bootstrap replicates per call (cost is linear in replicates)
+MAX_BOOTSTRAP = 2000
+# Bootstrap replicates are processed in batches so that
+# (replicates x tail size) stays around this many elements.
+_BOOTSTRAP_BATCH_ELEMENTS = 4_000_000
+
+
+def _validate_levels(levels):
+    levels = tuple(float(a) for a in levels)
+    if not levels:
+        raise ValueError("At least one tail level is required.")
+    for a in levels:
+        if not 0 < a < 1:
+            raise ValueError("Tail levels must be between 0 and 1 (exclusive).")
+    return levels
+
+
+def validate_bootstrap(n_bootstrap, max_bootstrap=MAX_BOOTSTRAP):
+    """Return n_bootstrap as an int, or raise ValueError unless 0 <= n <= max_bootstrap."""
+    if isinstance(n_bootstrap, bool) or not isinstance(n_bootstrap, (int, np.integer)):
+        raise ValueError("n_bootstrap must be an integer.")
+    if not 0 <= n_bootstrap <= max_bootstrap:
+        raise ValueError(f"n_bootstrap must be between 0 and {max_bootstrap}.")
+    return int(n_bootstrap)
+
+
+class TailAccumulator:
+    """
+    Streaming tail estimator.
+
+    Only the smallest `capacity` outcomes are retained (a little more than
+    the largest tail needs, so bootstrap resamples stay inside the buffer),
+    along with running moments for mean/std. Each update is a single
+    np.partition over buffer + chunk.
+
+    Parameters:
+    levels : iterable of float : tail probabilities, e.g. (0.05, 0.01)
+    n_total : int : total number of samples that will be fed in
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS, n_total=None):
+        self.levels = _validate_levels(levels)
+        if n_total is None or int(n_total) <= 0:
+            raise ValueError("n_total must be a positive sample count.")
+        self.n_total = int(n_total)
+
+        tail = math.ceil(max(self.levels) * self.n_total) + 1
+        margin = math.ceil(10 * math.sqrt(tail)) + 10
+        self.capacity = min(self.n_total, tail + margin)
+
+        self.count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._shift = None  # first value, keeps the variance sum well-conditioned
+        self._buffer = np.empty(0)
+
+    def update(self, chunk):
+        """Feed the next chunk of P&L samples."""
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if chunk.size == 0:
+            return
+        if self._shift is None:
+            self._shift = float(chunk[0])
+        centered = chunk - self._shift
+        self.count += chunk.size
+        self._sum += float(centered.sum())
+        self._sumsq += float(np.dot(centered, centered))
+
+        combined = np.concatenate((self._buffer, chunk))
+        if combined.size > self.capacity:
+            combined = np.partition(combined, self.capacity - 1)[: self.capacity]
+        self._buffer = combined
+
+    def result(self, n_bootstrap=0, confidence=0.95, seed=None, max_bootstrap=MAX_BOOTSTRAP):
+        """
+        Compute tail metrics for everything fed so far.
+
+        Parameters:
+        n_bootstrap : int : number of bootstrap replicates (0 disables CIs)
+        max_bootstrap : int : largest accepted n_bootstrap
+        confidence : float : two-sided confidence for the bootstrap intervals
+        seed : int : random seed for the bootstrap
+
+        Returns:
+        dict : {
+            "n": int, "mean": float, "std": float,
+            "tail": list of {"level", "VaR", "ES"[, "VaR_ci", "ES_ci"]}
+        }
+        """
+        n = self.count
+        if n == 0:
+            raise ValueError("No samples were provided.")
+        if n > self.n_total:
+            raise ValueError("More samples were fed than n_total.")
+
+        tail = np.sort(self._buffer)  # only the retained tail is sorted
+        cum = np.cumsum(tail)
+
+        metrics = []
+        for a in self.levels:
+            h = (n - 1) * a
+            lo = int(math.floor(h))
+            hi = min(lo + 1, tail.size - 1)
+            var = tail[lo] + (h - lo) * (tail[hi] - tail[lo])
+            m = max(1, math.ceil(a * n))
+            es = cum[m - 1] / m
+            metrics.append({"level": a, "VaR": float(var), "ES": float(es)})
+
+        n_bootstrap = validate_bootstrap(n_bootstrap, max_bootstrap)
+        if n_bootstrap:
+            var_ci, es_ci = _bootstrap_intervals(
+                tail, n, self.levels, n_bootstrap, confidence, seed
+            )
+            for i, entry in enumerate(metrics):
+                entry["VaR_ci"] = var_ci[i]
+                entry["ES_ci"] = es_ci[i]
+
+        mean_c = self._sum / n
+        variance = max(self._sumsq / n - mean_c**2, 0.0)
+        return {
+            "n": n,
+            "mean": float(self._shift + mean_c),
+            "std": float(math.sqrt(variance)),
+            "tail": metrics,
+        }
+
+
+def _bootstrap_intervals(tail, n, levels, n_bootstrap, confidence, seed):
+    """
+    Poisson bootstrap over the retained sorted tail.
+
+    Each original outcome is drawn Poisson(1) times per replicate, which
+    is equivalent to multinomial resampling for large n and lets us
+    resample the tail without the rest of the sample: outcomes outside the
+    buffer only contribute to the replicate's total count.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1.")
+    rng = np.random.default_rng(seed)
+    size = tail.size
+    levels_arr = np.asarray(levels)
+
+    batch = max(1, _BOOTSTRAP_BATCH_ELEMENTS // max(size, 1))
+    var_samples = []
+    es_samples = []
+    for start in range(0, n_bootstrap, batch):
+        b = min(batch, n_bootstrap - start)
+        counts = rng.poisson(1.0, size=(b, size)).astype(float)
+        cum_counts = np.cumsum(counts, axis=1)
+        cum_values = np.cumsum(counts * tail, axis=1)
+        totals = cum_counts[:, -1] + rng.poisson(max(n - size, 0), size=b)
+        totals = np.maximum(totals, 1)
+
+        # (b x levels) number of worst outcomes defining each replicate's tail
+        m = np.maximum(np.ceil(levels_arr[None, :] * totals[:, None]), 1)
+        # index of the first tail value whose cumulative count reaches m
+        idx = np.minimum(
+            (cum_counts[:, None, :] < m[:, :, None]).sum(axis=2), size - 1
+        )
+        rows = np.arange(b)[:, None]
+        var_b = tail[idx]
+        below_counts = np.where(idx > 0, cum_counts[rows, idx - 1], 0.0)
+        below_values = np.where(idx > 0, cum_values[rows, idx - 1], 0.0)
+        es_b = (below_values + (m - below_counts) * var_b) / m
+
+        var_samples.append(var_b)
+        es_samples.append(es_b)
+
+    var_samples = np.concatenate(var_samples)
+    es_samples = np.concatenate(es_samples)
+    q = [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+    var_ci = np.percentile(var_samples, q, axis=0).T
+    es_ci = np.percentile(es_samples, q, axis=0).T
+    return var_ci.tolist(), es_ci.tolist()
+
+
+def tail_metrics(samples, levels=DEFAULT_LEVELS, n_bootstrap=0, confidence=0.95, seed=None,
+                 max_bootstrap=MAX_BOOTSTRAP):
+    """
+    Tail metrics for an in-memory P&L sample (one partition pass).
+
+    See TailAccumulator.result for the return shape.
+    """
+    samples = np.asarray(samples, dtype=float).ravel()
+    acc = TailAccumulator(levels, n_total=samples.size)
+    acc.update(samples)
+    return acc.result(
+        n_bootstrap=n_bootstrap, confidence=confidence, seed=seed, max_bootstrap=max_bootstrap
+    )
@@ -55,3 +55,95 @@ export const simulatePortfolio = async (
   });
   return response.data;
 };
+
+export const createPortfolioSession = async (
+  portfolio: any[],
+  currentPrice: number,
+  riskFreeRate: number,
+  ticker: string
+) => {
+  const response = await axios.post(`${API_BASE}/portfolio/session`, {
+    portfolio,
+    current_price: currentPrice,
+    risk_free_rate: riskFreeRate,
+    ticker,
+  });
+  return response.data;
+};
+
+export const addSessionLegs = async (sessionId: string, legs: any[]) => {
+  const response = await axios.post(
+    `${API_BASE}/portfolio/session/${sessionId}/legs`,
+    { legs }
+  );
+  return response.data;
+};
+
+export const modifySessionLeg = async (
+  sessionId: string,
+  legId: number,
+  changes: any
+) => {
+  const response = await axios.patch(
+    `${API_BASE}/portfolio/session/${sessionId}/legs/${legId}`,
+    changes
+  );
+  return response.data;
+};
+
+export const removeSessionLeg = async (sessionId: string, legId: number) => {
+  const response = await axios.delete(
+    `${API_BASE}/portfolio/session/${sessionId}/legs/${legId}`
+  );
+  return response.data;
+};
+
+export const updateSessionMarket = async (
+  sessionId: string,
+  currentPrice: number,
+  riskFreeRate: number
+) => {
+  const response = await axios.post(
+    `${API_BASE}/portfolio/session/${sessionId}/market`,
+    { current_price: currentPrice, risk_free_rate: riskFreeRate }
+  );
+  return response.data;
+};
+
+export const stressPortfolio = async (
+  portfolio: any[],
+  currentPrice: number,
+  riskFreeRate: number,
+  ticker: string,
+  scenarios?: (string | Record<string, any>)[]
+) => {
+  const response = await axios.post(`${API_BASE}/portfolio/stress`, {
+    portfolio,
+    current_price: currentPrice,
+    risk_free_rate: riskFreeRate,
+    ticker,
+    scenarios,
+  });
+  return response.data;
+};
+
+export const hedgePortfolio = async (
+  portfolio: any[],
+  currentPrice: number,
+  riskFreeRate: number,
+  ticker: string,
+  rebalanceEvery: number = 1,
+  transactionCost: number = 0
+) => {
+  const response = await axios.post(`${API_BASE}/portfolio/hedge`, {
+    portfolio,
+    current_price: currentPrice,
+    risk_free_rate: riskFreeRate,
+    horizon: 0.5,
+    n_simulations: 10000,
+    rebalance_every: rebalanceEvery,
+    transaction_cost: transactionCost,
+    ticker,
+  });
+  return response.data;
+};